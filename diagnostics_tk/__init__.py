@@ -27,41 +27,275 @@
 
 
 import concurrent.futures
+import datetime
+import decimal
+import enum
+import fractions
+import functools
+import hashlib
+import inspect
+import ipaddress
 import logging
+import multiprocessing
+import os
+import pathlib
 import re
+import shelve
 import sys
-from typing import Any, Callable, Dict, Type, Union
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple, Type, Union
 
 from .output import Output
+from .pool import ThreadPool
+
+_WS_RE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=256)
+def _discover_test_names(cls: Type) -> Tuple[str, ...]:
+    """
+    Returns the names of the test methods of `cls`. These are the methods
+    decorated with `diagnostics_tk.tools.diag_test` or, when there are none,
+    all callable `test_` attributes. The result only depends on the shape of
+    the class so it is cached per class.
+
+    Args:
+        - cls: The class of a test collection instance
+
+    Returns:
+        - The sorted names of the test methods
+    """
+    names = {name for klass in cls.__mro__ for name in vars(klass)}
+    tagged = tuple(
+        sorted(
+            name
+            for name in names
+            if getattr(getattr(cls, name, None), "_is_diag_test", False)
+        )
+    )
+    if tagged:
+        return tagged
+    return tuple(
+        name
+        for name in dir(cls)
+        if name.startswith("test_") and callable(getattr(cls, name))
+    )
+
+
+_DOC_CACHE: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+_DOC_CACHE_SIZE = 1024
+_DOC_CACHE_LOCK = threading.Lock()
+
+
+def _render_doc(doc_template: str, kwargs: Dict[str, Any]) -> str:
+    """
+    Renders `doc_template` using `kwargs` and collapses all whitespace.
+
+    Rendered docstrings are cached by the type and repr of each value rather
+    than the values themselves. Values which compare equal but format
+    differently, like `Decimal("1.0")` and `Decimal("1.00")`, don't collide,
+    and the cache holds no references to the values.
+
+    Args:
+        - doc_template: The docstring to render
+        - kwargs: The values to render with
+
+    Returns:
+        - The rendered docstring
+    """
+    try:
+        key = (
+            doc_template,
+            tuple(
+                sorted(
+                    (name, type(value), repr(value)) for name, value in kwargs.items()
+                )
+            ),
+        )
+    except Exception:
+        # a value without a working repr can't be cached
+        return _WS_RE.sub(" ", doc_template.format(**kwargs))
+
+    with _DOC_CACHE_LOCK:
+        if key in _DOC_CACHE:
+            _DOC_CACHE.move_to_end(key)
+            return _DOC_CACHE[key]
+    rendered = _WS_RE.sub(" ", doc_template.format(**kwargs))
+    with _DOC_CACHE_LOCK:
+        _DOC_CACHE[key] = rendered
+        if len(_DOC_CACHE) > _DOC_CACHE_SIZE:
+            _DOC_CACHE.popitem(last=False)
+    return rendered
+
+
+_PRIMITIVES = (str, bytes, int, float, complex, bool, type(None))
+# value types of which the repr fully describes the value
+_VALUE_TYPES = (
+    decimal.Decimal,
+    fractions.Fraction,
+    pathlib.PurePath,
+    ipaddress.IPv4Address,
+    ipaddress.IPv6Address,
+    ipaddress.IPv4Network,
+    ipaddress.IPv6Network,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+    uuid.UUID,
+    enum.Enum,
+)
+
+
+def _stable_repr(value: Any) -> Union[str, None]:
+    """
+    Returns a representation of `value` which is stable across processes.
+    Primitive values, well known value types and containers of them are
+    represented by their value.
+
+    Args:
+        - value: The value to represent
+
+    Returns:
+        - The representation or None when `value` can't be represented
+          stably, for example because its default repr embeds a memory
+          address.
+    """
+    if isinstance(value, _PRIMITIVES) or isinstance(value, _VALUE_TYPES):
+        return repr(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_stable_repr(item) for item in value]
+        if None in items:
+            return None
+        if isinstance(value, (set, frozenset)):
+            items.sort()
+        return f"{type(value).__name__}({', '.join(items)})"
+    if isinstance(value, dict):
+        items = []
+        for key, item in value.items():
+            key_repr, item_repr = _stable_repr(key), _stable_repr(item)
+            if key_repr is None or item_repr is None:
+                return None
+            items.append(f"{key_repr}: {item_repr}")
+        return f"dict({', '.join(sorted(items))})"
+    return None
+
+
+class _StderrHandler(logging.StreamHandler):
+    """
+    A `StreamHandler` writing to whatever `sys.stderr` is at the time of
+    emitting. While an output such as a rich Live display redirects
+    `sys.stderr`, records are rendered through it instead of garbling it.
+    """
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stderr
 
 
 class DiagnosticsRunner:
     """
     A context manager to execute registered diagnostics class methods in a
-    pool of threads.
+    pool of threads or processes.
 
     Args:
         - name: The name to assign to the instance. This is used in logging
           output.
-        - workers: The number of threads to assign to the threadpool.
+        - workers: The number of workers to assign to the pool. Defaults to
+          the number of CPUs minus one with a minimum of 2. The pool is
+          created on the first run, lives as long as the runner and is shut
+          down on exit.
+        - executor_kind: Either `thread` or `process`. Use `process` for
+          CPU bound test collections which would otherwise serialize on the
+          GIL. The registered test collections have to be picklable. A pool
+          of processes never has more workers than CPUs or tests to run.
+        - cpu_affinity: When set, the CPUs to pin the workers to. Threads are
+          each pinned to a single CPU in turn, processes to all of them. All
+          of them have to be available to the current process. Ignored on
+          platforms without `os.sched_setaffinity`.
+        - cache_path: When set, the path of an on-disk cache. A test which
+          succeeded less than `cache_ttl` seconds ago and of which neither the
+          source code nor the attributes of its collection have changed is not
+          executed again. Its cached result is submitted instead. Tests of
+          collections with attributes other than primitive values, common
+          value types such as `Path`, `Decimal`, `datetime`, IP addresses
+          and enums, or containers of them are never cached since changes to
+          them can't be detected reliably. The cache also keeps the
+          duration of each test so the slowest tests can be started first.
+          Durations are only measured by the thread pool, so with a process
+          pool the tests are started in the order they were registered.
+        - cache_ttl: The number of seconds a cached result remains valid.
+        - cache_max_entries: The maximum number of results kept in the cache.
+          Once exceeded, expired and the oldest entries are evicted until 90%
+          of it is left.
     """
 
-    def __init__(self, name: str, workers: int):
+    def __init__(
+        self,
+        name: str,
+        workers: Union[int, None] = None,
+        executor_kind: str = "thread",
+        cpu_affinity: Union[List[int], None] = None,
+        cache_path: Union[str, None] = None,
+        cache_ttl: int = 300,
+        cache_max_entries: int = 1024,
+    ):
+        if executor_kind not in ("thread", "process"):
+            raise ValueError(
+                f"Unknown executor_kind `{executor_kind}`. Expected `thread` or `process`."
+            )
+        if workers is None:
+            workers = max(2, (os.cpu_count() or 4) - 1)
+        elif workers < 1:
+            raise ValueError(f"workers must be at least 1, got `{workers}`.")
+        if cpu_affinity and hasattr(os, "sched_getaffinity"):
+            unavailable = set(cpu_affinity) - os.sched_getaffinity(0)
+            if unavailable:
+                raise ValueError(
+                    f"cpu_affinity contains CPUs which aren't available: {sorted(unavailable)}."
+                )
         self.name = name
         self.workers = workers
+        self.executor_kind = executor_kind
+        self.cpu_affinity = cpu_affinity
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
 
         self.diag_tests = {}
         self.outputs = []
         self.methods = []
+        self.durations = {}
+        # maps the futures of the process pool to their registered method
+        self.future_meta: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
         self.logger = self.__get_logger()
+        self.executor = None
+        self.cache = None if cache_path is None else shelve.open(str(cache_path))
+        # the store time of each cache entry, to evict without reading them all
+        self.cache_times = (
+            {}
+            if self.cache is None
+            else {name: entry["time"] for name, entry in self.cache.items()}
+        )
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
-        self.run()
-        for output in self.outputs:
-            output.flush()
+        try:
+            self.run()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+            if self.cache is not None:
+                self.cache.close()
+            for output in self.outputs:
+                output.flush()
 
     def __get_logger(self) -> logging.Logger:
         """
@@ -73,17 +307,54 @@ class DiagnosticsRunner:
         root = logging.getLogger()
         root.setLevel(logging.DEBUG)
 
-        handler = logging.StreamHandler(sys.stderr)
-        handler.setLevel(logging.DEBUG)
-        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        handler.setFormatter(formatter)
-        root.addHandler(handler)
+        # only install our handler once, no matter how many runners are
+        # created, otherwise each record is written once per runner
+        if not any(getattr(handler, "_diag_tk", False) for handler in root.handlers):
+            handler = _StderrHandler()
+            handler.setLevel(logging.DEBUG)
+            # %(created) avoids the strftime() call of %(asctime) per record
+            formatter = logging.Formatter("%(created).3f - %(levelname)s - %(message)s")
+            handler.setFormatter(formatter)
+            handler._diag_tk = True  # type: ignore
+            root.addHandler(handler)
         return root
 
+    def __get_executor(self) -> Union[ThreadPool, concurrent.futures.Executor]:
+        """
+        Creates and returns the executor matching `executor_kind`.
+
+        Returns:
+            - The executor instance.
+        """
+        if not hasattr(os, "sched_setaffinity"):
+            cpu_affinity = None
+        else:
+            cpu_affinity = self.cpu_affinity
+
+        if self.executor_kind == "thread":
+            return ThreadPool(workers=self.workers, cpu_affinity=cpu_affinity)
+        else:
+            # forkserver avoids forking a parent which already runs threads
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+            else:
+                context = None
+            workers = min(self.workers, os.cpu_count() or 1, max(1, len(self.methods)))
+            if cpu_affinity:
+                initializer, initargs = os.sched_setaffinity, (0, set(cpu_affinity))
+            else:
+                initializer, initargs = None, ()
+            return concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=initializer,
+                initargs=initargs,
+            )
+
     def __is_diag_instance(self, obj: Any) -> bool:
         """
-        Validates whether `obj` has any methods which start with `test_` which
-        we then consider as a collection of tests.
+        Validates whether `obj` has any test methods which we then consider
+        as a collection of tests.
 
         Args:
             - obj: An object instance
@@ -92,10 +363,7 @@ class DiagnosticsRunner:
             - The conclusion
         """
 
-        for func in dir(obj):
-            if func.startswith("test_") and callable(getattr(obj, func)):
-                return True
-        return False
+        return bool(_discover_test_names(type(obj)))
 
     def __render_doc_string(
         self, func: Callable, kwargs: Dict[str, Any]
@@ -111,8 +379,7 @@ class DiagnosticsRunner:
             )
         else:
             try:
-                doc = func.__doc__.format(**kwargs)
-                return re.sub(r"\s+", " ", doc)
+                return _render_doc(func.__doc__, kwargs)
             except Exception as err:
                 self.logger.error(
                     f"Failed to render docstring of function `{func.__name__}`. Reason: {err}"
@@ -120,9 +387,123 @@ class DiagnosticsRunner:
 
         return None
 
+    def __get_cache_key(self, obj: Any, func: Callable) -> Union[str, None]:
+        """
+        Calculates the cache key of test method `func` of `obj` out of the
+        class of `obj`, the name and source code of `func` and the
+        attributes of `obj`. The class is included since collections of
+        different classes can share an inherited test method which behaves
+        differently in each of them.
+
+        Args:
+            - obj: The test collection instance
+            - func: The test method
+
+        Returns:
+            - The cache key or None when caching is disabled, the source
+              code of `func` is not available or an attribute of `obj` can't
+              be represented stably.
+        """
+        if self.cache is None:
+            return None
+        try:
+            source = inspect.getsource(func)
+        except (OSError, TypeError):
+            return None
+        cls = type(obj)
+        digest = hashlib.blake2b()
+        for part in (cls.__module__, cls.__qualname__, func.__name__, source):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        attributes = _stable_repr(obj.__dict__)
+        if attributes is None:
+            return None
+        digest.update(attributes.encode())
+        return digest.hexdigest()
+
+    def __cache_get(self, key: Union[str, None]) -> Union[Tuple[bool, str], None]:
+        """
+        Looks up a non-expired successful result in the cache.
+
+        Args:
+            - key: The cache key of the test method
+
+        Returns:
+            - The cached (result, reason) or None
+        """
+        if self.cache is None or key is None:
+            return None
+        entry = self.cache.get(key)
+        if (
+            entry is None
+            or not entry["result"]
+            or time.time() - entry["time"] > self.cache_ttl
+        ):
+            return None
+        return entry["result"], entry["reason"]
+
+    def __cache_set(
+        self,
+        key: Union[str, None],
+        result: bool,
+        reason: str,
+        duration: Union[float, None],
+    ) -> None:
+        """
+        Stores a result in the cache. Once it holds more than
+        `cache_max_entries` entries, expired and the oldest entries are
+        evicted until 90% of `cache_max_entries` is left. Failed results are
+        stored to keep track of the duration but are never served.
+
+        Args:
+            - key: The cache key of the test method
+            - result: The result of the test
+            - reason: The reason of the result
+            - duration: The duration of the test in seconds, if known
+        """
+        if self.cache is None or key is None:
+            return
+        now = time.time()
+        self.cache[key] = {
+            "result": result,
+            "reason": reason,
+            "time": now,
+            "duration": duration,
+        }
+        self.cache_times[key] = now
+        if len(self.cache_times) > self.cache_max_entries:
+            # trim below the limit so we don't evict again on the next result
+            entries = sorted(
+                (stored, name) for name, stored in self.cache_times.items()
+            )
+            excess = len(entries) - int(self.cache_max_entries * 0.9)
+            for index, (stored, name) in enumerate(entries):
+                if index < excess or now - stored > self.cache_ttl:
+                    del self.cache[name]
+                    del self.cache_times[name]
+
+    def __expected_duration(self, method: Dict[str, Any]) -> float:
+        """
+        Returns the last known duration of `method` in seconds or 0 when
+        unknown.
+
+        Args:
+            - method: The registered method
+
+        Returns:
+            - The duration in seconds
+        """
+        if method["name"] in self.durations:
+            return self.durations[method["name"]]
+        if self.cache is not None and method["key"] is not None:
+            entry = self.cache.get(method["key"])
+            if entry is not None:
+                return entry.get("duration") or 0.0
+        return 0.0
+
     def __extract_test_methods(self, obj: Type):
         """
-        Extracts `test_` methods from `obj` and yields all entries.
+        Extracts the test methods from `obj` and yields all entries.
 
         Args:
             - obj: The class instance to extract methods from
@@ -131,44 +512,67 @@ class DiagnosticsRunner:
             - Name of the method
             - Method object
             - Docstring
+            - Cache key
 
         """
         class_name = type(obj).__name__
-        for name in dir(obj):
+        for name in _discover_test_names(type(obj)):
             func = getattr(obj, name)
-            if name.startswith("test_") and callable(func):
-                doc = self.__render_doc_string(func=func, kwargs=dict(obj.__dict__))
-                yield f"{self.name}::{class_name}({obj._name})::{name}", func, doc
-
-    def __callback(self, future: concurrent.futures.Future):
+            doc = self.__render_doc_string(func=func, kwargs=dict(obj.__dict__))
+            key = self.__get_cache_key(obj, func)
+            yield f"{self.name}::{class_name}({obj._name})::{name}", func, doc, key
+
+    def __callback(
+        self,
+        method: Dict[str, Any],
+        error: Union[BaseException, None],
+        duration: Union[float, None] = None,
+    ):
         """
-        Executed as a callback for every future instance which finishes.
+        Executed for every diagnostic method which finishes.
         This method evaluates whether the diagnostic test has raised an
         `AssertionError`. Besides this this callback runs the results of each executed
         diagnostics test through all registered output modules.
 
         Args:
-            future: The future instance of the executed diagnostic method.
+            method: The registered method which has been executed.
+            error: The exception raised by the method, if any.
+            duration: The duration of the method in seconds, if known.
         """
-        try:
-            future.result()
-        except AssertionError as err:
-            self.logger.error(f'{future.method["name"]} - Failed. Reason: {err}')  # type: ignore
+        if isinstance(error, AssertionError):
+            self.logger.error("%s - Failed. Reason: %s", method["name"], error)
+            result = False
+            reason = str(error)
+
+        elif error is not None:
+            self.logger.error(
+                "%s - Failed. Reason: Unexpected error: %r", method["name"], error
+            )
             result = False
-            reason = str(err)
+            reason = f"{type(error).__name__}: {error}"
 
         else:
-            self.logger.info(f'{future.method["name"]} - OK')  # type: ignore
+            self.logger.info("%s - OK", method["name"])
             result = True
             reason = "n/a"
 
+        if duration is not None:
+            self.durations[method["name"]] = duration
+        self.__cache_set(method["key"], result, reason, duration)
+        self.__submit(method, result, reason)
+
+    def __submit(self, method: Dict[str, Any], result: bool, reason: str) -> None:
+        """
+        Runs the result of a diagnostics test through all registered output
+        modules.
+
+        Args:
+            - method: The registered method
+            - result: The result of the test
+            - reason: The reason of the result
+        """
         for output in self.outputs:
-            output.submit(
-                future.method["name"],  # type: ignore
-                future.method["doc"],  # type: ignore
-                result,
-                reason,
-            )
+            output.submit(method["name"], method["doc"], result, reason)
 
     def register(self, name: str, obj: Type) -> None:
         """
@@ -184,22 +588,45 @@ class DiagnosticsRunner:
             self.outputs.append(obj)
         elif self.__is_diag_instance(obj):
             self.logger.debug(f"Registered `{name}` as a test collection.")
-            for method_name, method, doc in self.__extract_test_methods(obj):
-                self.methods.append({"name": method_name, "method": method, "doc": doc})
+            for method_name, method, doc, key in self.__extract_test_methods(obj):
+                self.methods.append(
+                    {"name": method_name, "method": method, "doc": doc, "key": key}
+                )
 
     def run(self):
         """
-        Executes each method into a thread.
-        """
-        futures = []
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.workers
-        ) as executor:
-            for method in self.methods:
-                future = executor.submit(method["method"])
-                # lets piggy back and go along for the ride
-                future.method = method
-                future.add_done_callback(self.__callback)
+        Executes each method in the runner's pool of workers.
+        """
+        pending = []
+        for method in self.methods:
+            cached = self.__cache_get(method["key"])
+            if cached is not None:
+                self.logger.info("%s - OK (cached)", method["name"])
+                self.__submit(method, *cached)
+            else:
+                pending.append(method)
+        # start the slowest tests first to shorten the total run time. Only
+        # the thread pool measures durations, with a process pool this keeps
+        # the registration order.
+        pending.sort(key=self.__expected_duration, reverse=True)
+
+        if self.executor is None:
+            self.executor = self.__get_executor()
+
+        if self.executor_kind == "process":
+            futures = []
+            for method in pending:
+                future = self.executor.submit(method["method"])
+                self.future_meta[future] = method
                 futures.append(future)
 
-            concurrent.futures.as_completed(futures)
+            # The pool is not joined at the end of each run so we process
+            # the results here rather than in done callbacks, which might still
+            # be running once the last future reports completion.
+            for future in concurrent.futures.as_completed(futures):
+                method = self.future_meta.pop(future)
+                self.__callback(method, future.exception())
+        else:
+            tasks = ((method, method["method"]) for method in pending)
+            for method, error, duration in self.executor.run(tasks):
+                self.__callback(method, error, duration)
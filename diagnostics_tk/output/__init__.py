@@ -26,9 +26,16 @@
 # SOFTWARE.
 
 
+import threading
+import time
+from queue import Empty, SimpleQueue
+
+
 class Output:
     def __init__(self):
-        pass
+        self._queue = SimpleQueue()
+        self._drainer = None
+        self._drainer_lock = threading.Lock()
 
     def submit(self, name, description, result, reason):
         raise Exception("No submit method implemented")
@@ -36,5 +43,59 @@ class Output:
     def flush(self):
         raise Exception("No flush method implemented")
 
+    def _write(self, batch):
+        raise Exception("No _write method implemented")
+
+    def _enqueue(self, item):
+        """
+        Queues `item` to be handed over to `_write` in batches by a background
+        thread which is started on first use.
+        """
+        with self._drainer_lock:
+            if self._drainer is None:
+                self._drainer = threading.Thread(target=self._drain, daemon=True)
+                self._drainer.start()
+        self._queue.put(item)
+
+    def _drain(self, batch_size=64, max_wait_ms=50):
+        """
+        Collects up to `batch_size` queued items, waiting no longer than
+        `max_wait_ms` for a batch to fill up, and hands them over to `_write`
+        until `_stop_drain` is called.
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + max_wait_ms / 1000
+            stop = False
+            while len(batch) < batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            if stop:
+                return
+
+    def _stop_drain(self):
+        """
+        Waits until all queued items are written and stops the background
+        thread.
+        """
+        with self._drainer_lock:
+            drainer, self._drainer = self._drainer, None
+        if drainer is not None:
+            self._queue.put(None)
+            drainer.join()
+
 
 from .console_table import ConsoleTable  # noqa: E402, F401
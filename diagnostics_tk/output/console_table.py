@@ -27,6 +27,7 @@
 
 from rich import box
 from rich.console import Console
+from rich.live import Live
 from rich.table import Table
 
 from . import Output
@@ -34,15 +35,37 @@ from . import Output
 
 class ConsoleTable(Output):
     def __init__(self, title="Diagnostic results."):
+        super().__init__()
         self.table = Table(title=title, box=box.ASCII, show_lines=True)
         self.table.add_column("Name", justify="left", style="cyan", no_wrap=True)
         self.table.add_column("Description", style="magenta")
         self.table.add_column("Result", justify="left", style="green")
         self.table.add_column("Reason", justify="left", style="green")
+        # rows are rendered as they are submitted instead of all at once on
+        # flush. The display is only started with the first row so log
+        # records emitted before that aren't mixed up with it.
+        self._live = Live(
+            self.table, console=Console(), refresh_per_second=8, auto_refresh=True
+        )
 
     def submit(self, name, description, result, reason):
-        self.table.add_row(name, description, str(result), reason)
+        with self._drainer_lock:
+            if not self._live.is_started:
+                self._live.start()
+        self._enqueue((name, description, str(result), reason))
+
+    def _write(self, batch):
+        # the refresh thread renders the table while holding this lock
+        with self._live._lock:
+            for row in batch:
+                self.table.add_row(*row)
 
     def flush(self):
-        console = Console()
-        console.print(self.table)
+        self._stop_drain()
+        if not self._live.is_started:
+            self._live.console.print(self.table)
+            return
+        self._live.stop()
+        # Live only terminates its output with a newline on terminals
+        if not self._live.console.is_terminal:
+            self._live.console.line()
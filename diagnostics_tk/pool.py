@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  pool.py
+#
+# The MIT License (MIT)
+#
+# Copyright © 2023 Jelle Smet <development@smetj.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import threading
+import time
+from collections import deque
+from queue import SimpleQueue
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Union
+
+
+class ThreadPool:
+    """
+    A minimal work stealing pool of long-lived worker threads.
+
+    Contrary to `concurrent.futures.ThreadPoolExecutor` no `Future` is created
+    per task. Each worker owns a deque of tasks which are distributed round
+    robin. A worker which runs out of tasks steals from the busiest other
+    worker so a few slow tasks don't hold back the ones queued behind them.
+    Workers report back through a queue which is drained by the submitting
+    thread.
+
+    Args:
+        - workers: The number of worker threads.
+        - cpu_affinity: When set, each worker thread pins itself to one of
+          these CPUs in turn.
+    """
+
+    def __init__(self, workers: int, cpu_affinity: Union[List[int], None] = None):
+        self.workers = workers
+        self.cpu_affinity = cpu_affinity
+
+        self.__queues = [deque() for _ in range(workers)]
+        self.__results = SimpleQueue()
+        self.__condition = threading.Condition()
+        self.__stopped = False
+        self.__threads = []
+        for index in range(workers):
+            thread = threading.Thread(target=self.__work, args=(index,), daemon=True)
+            thread.start()
+            self.__threads.append(thread)
+
+    def __take(self, index: int) -> Union[Tuple[Any, Callable], None]:
+        """
+        Takes the next task of worker `index`, stealing one from the worker
+        with the most queued tasks when its own deque is empty. Single deque
+        operations are atomic so no lock is required.
+
+        Args:
+            - index: The index of the worker
+
+        Returns:
+            - The (tag, func) task or None when no task was found.
+        """
+        try:
+            # the oldest task sits at the right end of our own deque
+            return self.__queues[index].pop()
+        except IndexError:
+            pass
+        victim = max(self.__queues, key=len)
+        try:
+            return victim.popleft()
+        except IndexError:
+            return None
+
+    def __work(self, index: int) -> None:
+        """
+        The loop executed by each worker thread.
+
+        Args:
+            - index: The index of the worker
+        """
+        if self.cpu_affinity:
+            # on Linux pid 0 refers to the calling thread only
+            os.sched_setaffinity(0, {self.cpu_affinity[index % len(self.cpu_affinity)]})
+        while True:
+            task = self.__take(index)
+            if task is None:
+                with self.__condition:
+                    while not any(self.__queues) and not self.__stopped:
+                        self.__condition.wait()
+                    if not any(self.__queues):
+                        return
+                continue
+            tag, func = task
+            start = time.monotonic()
+            try:
+                func()
+            except BaseException as err:
+                # like concurrent.futures, also report SystemExit and friends
+                # so every task posts exactly one result
+                self.__results.put((tag, err, time.monotonic() - start))
+            else:
+                self.__results.put((tag, None, time.monotonic() - start))
+
+    def run(
+        self, tasks: Iterable[Tuple[Any, Callable]]
+    ) -> Iterator[Tuple[Any, Union[BaseException, None], float]]:
+        """
+        Executes all `tasks` and yields their outcome in completion order.
+        Tasks are started roughly in the provided order so callers can put
+        the slowest tasks first.
+
+        Args:
+            - tasks: (tag, func) pairs. `func` is called without arguments.
+
+        Yields:
+            - The tag of the finished task
+            - The exception raised by `func` or None
+            - The duration of `func` in seconds
+        """
+        tasks = list(tasks)
+        with self.__condition:
+            for number, task in enumerate(tasks):
+                self.__queues[number % self.workers].appendleft(task)
+            self.__condition.notify_all()
+        for _ in range(len(tasks)):
+            yield self.__results.get()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the worker threads once all queued tasks are executed.
+
+        Args:
+            - wait: Whether to wait for the worker threads to exit.
+        """
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+        if wait:
+            for thread in self.__threads:
+                thread.join()
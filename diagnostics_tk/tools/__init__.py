@@ -25,26 +25,107 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import functools
 import re
+import shlex
+import shutil
 import subprocess
-from typing import Tuple
+from typing import Callable, List, Pattern, Sequence, Tuple, Union
+
+_SHELL_METACHARS = re.compile(r"[|&;<>()$`\\*?\[\]{}~!#\n]")
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(pattern: Union[str, bytes], flags: int) -> Pattern:
+    """
+    Compiles `pattern` once for all invocations using it.
+    """
+    return re.compile(pattern, flags)
+
+
+def _search(pattern: Union[str, bytes], output: bytes) -> bool:
+    """
+    Searches the captured `output` for `pattern`. Only str patterns require
+    the output to be decoded, bytes patterns are searched on the raw output.
+    """
+    if isinstance(pattern, str):
+        output = output.decode("utf-8", errors="replace")
+    return _compile(pattern, re.MULTILINE).search(output) is not None
+
+
+def diag_test(func: Callable) -> Callable:
+    """
+    Marks `func` as a diagnostic test. Once a test collection has any marked
+    methods only those are executed, regardless of their name.
+    """
+    func._is_diag_test = True  # type: ignore
+    return func
+
+
+def _to_argv(command: Union[str, Sequence[str]]) -> Union[List[str], None]:
+    """
+    Converts `command` into an argument list which can be executed without a
+    shell. The executable is resolved to an absolute path.
+
+    Returns:
+        - The argument list or None when `command` requires a shell, either
+          because it uses shell syntax or because its executable isn't
+          found on `PATH`, as is the case for shell builtins.
+    """
+    if isinstance(command, str):
+        if _SHELL_METACHARS.search(command):
+            return None
+        try:
+            argv = shlex.split(command)
+        except ValueError:
+            # let the shell report syntax errors such as unbalanced quotes
+            return None
+        # leading `VAR=value` assignments are handled by the shell
+        if not argv or "=" in argv[0]:
+            return None
+    else:
+        argv = list(command)
+        if not argv:
+            return None
+    executable = shutil.which(argv[0])
+    if executable is None:
+        return None
+    return [executable, *argv[1:]]
 
 
 def exec_cli(
-    command, exit_code=None, stdout_pattern=None, stderr_pattern=None, timeout=60
+    command: Union[str, Sequence[str]],
+    exit_code=None,
+    stdout_pattern=None,
+    stderr_pattern=None,
+    timeout=60,
 ) -> Tuple[bool, str]:
+    argv = _to_argv(command)
+    if argv is None:
+        if not isinstance(command, str):
+            command = shlex.join(command)
+        # The shell path never qualifies for posix_spawn so we keep
+        # detaching the child from our controlling terminal.
+        kwargs = {"args": command, "shell": True, "start_new_session": True}
+    else:
+        # An absolute executable without close_fds lets CPython use
+        # posix_spawn instead of fork + exec. Our own file descriptors are
+        # non-inheritable by default so nothing leaks into the child. A new
+        # session would force the fork path, so the child shares our
+        # controlling terminal.
+        kwargs = {"args": argv, "close_fds": False}
+
     try:
         result = subprocess.run(
-            command,
-            shell=True,
+            **kwargs,
             check=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            capture_output=True,
             timeout=timeout,
-            start_new_session=True,
         )
     except subprocess.TimeoutExpired:
         return False, f"Test timed out after '{timeout}' seconds."
+    except OSError as err:
+        return False, f"Failed to execute command. Reason: {err}"
 
     if exit_code is not None:
         if result.returncode != exit_code:
@@ -54,11 +135,11 @@ def exec_cli(
             )
 
     if stdout_pattern is not None:
-        if not re.search(stdout_pattern, result.stdout.decode(), re.MULTILINE):
+        if not _search(stdout_pattern, result.stdout):
             return False, f"STDOUT did not match regex '{stdout_pattern}'."
 
     if stderr_pattern is not None:
-        if not re.search(stderr_pattern, result.stderr.decode(), re.MULTILINE):
-            return False, f"STDERR did not match regex '{stdout_pattern}'."
+        if not _search(stderr_pattern, result.stderr):
+            return False, f"STDERR did not match regex '{stderr_pattern}'."
 
     return (True, "Good")
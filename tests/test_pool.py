@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_pool.py
+#
+
+import os
+import sys
+import threading
+
+import pytest
+
+from diagnostics_tk import DiagnosticsRunner
+from diagnostics_tk.pool import ThreadPool
+
+
+def run_with_timeout(func, timeout=5):
+    """
+    Executes `func` in a thread and returns its result, failing the test
+    instead of hanging when it doesn't finish within `timeout` seconds.
+    """
+    outcome = []
+    thread = threading.Thread(target=lambda: outcome.append(func()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert outcome, f"Did not finish within {timeout} seconds"
+    return outcome[0]
+
+
+def assert_false():
+    assert False, "failed"
+
+
+def test_system_exit_is_reported():
+    """
+    Test a task raising SystemExit is reported instead of killing its worker
+    """
+    pool = ThreadPool(workers=1)
+    results = run_with_timeout(
+        lambda: list(pool.run([("exit", lambda: sys.exit(3)), ("ok", lambda: None)]))
+    )
+    pool.shutdown()
+
+    errors = {tag: error for tag, error, _ in results}
+    assert isinstance(errors["exit"], SystemExit)
+    assert errors["ok"] is None
+
+
+def test_runner_system_exit():
+    """
+    Test a diagnostic test calling sys.exit() doesn't hang the runner
+    """
+
+    class Collection:
+        def test_exit(self):
+            """
+            Exits
+            """
+            sys.exit(3)
+
+    def run():
+        with DiagnosticsRunner(name="test", workers=1) as runner:
+            runner.register("collection", Collection())
+        return True
+
+    assert run_with_timeout(run)
+
+
+def test_one_result_per_task():
+    """
+    Test every task yields exactly one result
+    """
+    pool = ThreadPool(workers=3)
+    tasks = [(number, lambda: None) for number in range(100)]
+    results = run_with_timeout(lambda: list(pool.run(tasks)))
+    pool.shutdown()
+
+    assert sorted(tag for tag, _, _ in results) == list(range(100))
+    assert all(error is None and duration >= 0 for _, error, duration in results)
+
+
+def test_exceptions_are_reported():
+    """
+    Test exceptions raised by tasks are reported with their task
+    """
+    pool = ThreadPool(workers=2)
+    tasks = [("fail", lambda: 1 / 0), ("assert", lambda: assert_false())]
+    results = run_with_timeout(lambda: list(pool.run(tasks)))
+    pool.shutdown()
+
+    errors = {tag: error for tag, error, _ in results}
+    assert isinstance(errors["fail"], ZeroDivisionError)
+    assert isinstance(errors["assert"], AssertionError)
+
+
+def test_work_stealing():
+    """
+    Test an idle worker steals the tasks queued for a busy worker
+    """
+    pool = ThreadPool(workers=2)
+    release = threading.Event()
+    executed_by = {}
+
+    def task(number):
+        executed_by[number] = threading.get_ident()
+
+    # tasks are distributed round robin, so the first worker gets the
+    # blocking task and the even numbers which can only complete if they
+    # are stolen by the second worker
+    tasks = [(0, lambda: release.wait(5))]
+    tasks += [(number, lambda number=number: task(number)) for number in range(1, 6)]
+
+    def run():
+        finished = []
+        for tag, _, _ in pool.run(tasks):
+            finished.append(tag)
+            if len(finished) == len(tasks) - 1:
+                release.set()
+        return finished
+
+    finished = run_with_timeout(run)
+    pool.shutdown()
+
+    assert finished[-1] == 0
+    assert len(set(executed_by.values())) == 1
+
+
+def test_shutdown():
+    """
+    Test shutdown lets the workers exit
+    """
+    before = set(threading.enumerate())
+    pool = ThreadPool(workers=3)
+    workers = set(threading.enumerate()) - before
+    assert len(workers) == 3
+
+    run_with_timeout(lambda: list(pool.run([(0, lambda: None)])))
+    pool.shutdown(wait=True)
+    assert not any(worker.is_alive() for worker in workers)
+
+
+def test_runner_rejects_invalid_workers():
+    """
+    Test invalid worker settings are rejected instead of losing workers
+    """
+    with pytest.raises(ValueError):
+        DiagnosticsRunner(name="test", workers=0)
+    if hasattr(os, "sched_getaffinity"):
+        with pytest.raises(ValueError):
+            DiagnosticsRunner(name="test", cpu_affinity=[4096])
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_runner.py
+#
+
+from decimal import Decimal
+from ipaddress import ip_address
+
+from diagnostics_tk import DiagnosticsRunner, _stable_repr
+from diagnostics_tk.output import Output
+
+
+class Threshold:
+    def __init__(self, threshold):
+        self.threshold = threshold
+
+    def test_threshold(self):
+        """
+        Is the value below
+        threshold {threshold}?
+        """
+
+
+def render(*collections):
+    """
+    Registers `collections` under the same name and returns their rendered
+    docstrings.
+    """
+    runner = DiagnosticsRunner(name="test", workers=1)
+    for collection in collections:
+        runner.register("collection", collection)
+    return [method["doc"] for method in runner.methods]
+
+
+def test_render_doc_string():
+    """
+    Test docstrings are rendered with the collection attributes
+    """
+    assert render(Threshold(5)) == [" Is the value below threshold 5? "]
+
+
+def test_render_doc_string_equal_values():
+    """
+    Test values which compare equal but format differently don't share a
+    cached docstring
+    """
+    docs = render(
+        Threshold(Decimal("1.0")),
+        Threshold(Decimal("1.00")),
+        Threshold(0.0),
+        Threshold(-0.0),
+        Threshold(1),
+        Threshold(True),
+    )
+    assert [doc.split()[-1] for doc in docs] == [
+        "1.0?",
+        "1.00?",
+        "0.0?",
+        "-0.0?",
+        "1?",
+        "True?",
+    ]
+
+
+def test_render_doc_string_unhashable():
+    """
+    Test docstrings render with unhashable attribute values
+    """
+    assert render(Threshold([1, 2])) == [" Is the value below threshold [1, 2]? "]
+
+
+class Base:
+    def __init__(self, host):
+        self.host = host
+
+    def test_up(self):
+        """
+        Is {host} up?
+        """
+        self.check()
+
+
+class Http(Base):
+    def check(self):
+        pass
+
+
+class Dns(Base):
+    def check(self):
+        assert False, "down"
+
+
+class Results(Output):
+    def __init__(self):
+        super().__init__()
+        self.results = {}
+
+    def submit(self, name, description, result, reason):
+        self.results[name] = (result, reason)
+
+    def flush(self):
+        pass
+
+
+def run_cached(cache_path, collection, name="collection"):
+    """
+    Runs `collection` with a cache at `cache_path` and returns the results
+    submitted to the outputs.
+    """
+    output = Results()
+    with DiagnosticsRunner(name="test", workers=1, cache_path=cache_path) as runner:
+        runner.register(name, collection)
+        runner.register("results", output)
+    return list(output.results.values())
+
+
+def test_cache_hit(tmp_path, caplog):
+    """
+    Test an unchanged successful test is served from the cache
+    """
+    cache_path = tmp_path / "cache"
+    assert run_cached(cache_path, Http("smetj.net")) == [(True, "n/a")]
+    caplog.clear()
+    assert run_cached(cache_path, Http("smetj.net")) == [(True, "n/a")]
+    assert "OK (cached)" in caplog.text
+
+
+def test_cache_key_includes_class(tmp_path):
+    """
+    Test collections of different classes sharing an inherited test don't
+    share cached results
+    """
+    cache_path = tmp_path / "cache"
+    assert run_cached(cache_path, Http("smetj.net")) == [(True, "n/a")]
+    [(result, reason)] = run_cached(cache_path, Dns("smetj.net"))
+    assert not result and reason.startswith("down")
+
+
+class Address(Http):
+    def __init__(self, host, addr):
+        super().__init__(host)
+        self.addr = addr
+
+
+def test_cache_invalidated_by_value_types(tmp_path, caplog):
+    """
+    Test changing an attribute of a well known value type invalidates the
+    cache
+    """
+    cache_path = tmp_path / "cache"
+    run_cached(cache_path, Address("smetj.net", ip_address("10.0.0.1")))
+    caplog.clear()
+    run_cached(cache_path, Address("smetj.net", ip_address("10.9.9.9")))
+    assert "OK (cached)" not in caplog.text
+    run_cached(cache_path, Address("smetj.net", ip_address("10.9.9.9")))
+    assert "OK (cached)" in caplog.text
+
+
+def test_cache_skipped_for_unstable_attributes(tmp_path, caplog):
+    """
+    Test collections with attributes which can't be represented stably are
+    never cached
+    """
+    cache_path = tmp_path / "cache"
+    run_cached(cache_path, Address("smetj.net", object()))
+    caplog.clear()
+    run_cached(cache_path, Address("smetj.net", object()))
+    assert "OK (cached)" not in caplog.text
+
+
+def test_stable_repr():
+    """
+    Test values are only represented when their representation is stable
+    """
+    assert _stable_repr({"a": [1, (2.0, None)], "b": {3, 1}}) == (
+        "dict('a': list(1, tuple(2.0, None)), 'b': set(1, 3))"
+    )
+    assert _stable_repr(Decimal("1.0")) != _stable_repr(Decimal("1.00"))
+    assert _stable_repr([1, object()]) is None
+    assert _stable_repr({"client": object()}) is None
@@ -4,11 +4,8 @@
 #  test_style.py
 #
 
-from pathlib import Path
 from subprocess import run
 
-import black
-
 
 def test_ruff_conformance():
     """
@@ -30,10 +27,10 @@ def test_black():
     """
     Test whether code is formatted with black
     """
-
-    for path in Path("diagnostics_tk").rglob("*.py"):
-        assert not black.format_file_in_place(
-            Path(path),
-            fast=False,
-            mode=black.FileMode(),
-        )
+    result = run(
+        ["black", "--check", "--fast", "diagnostics_tk/"],
+        check=False,
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        assert False, result.stderr.decode()
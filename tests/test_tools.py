@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_tools.py
+#
+
+import shutil
+
+from diagnostics_tk.tools import _to_argv, exec_cli
+
+
+def test_to_argv_split():
+    """
+    Test plain commands are split and their executable resolved
+    """
+    assert _to_argv("ls -l 'a b'") == [shutil.which("ls"), "-l", "a b"]
+    assert _to_argv(["ls", "a;b"]) == [shutil.which("ls"), "a;b"]
+
+
+def test_to_argv_shell():
+    """
+    Test commands which require a shell aren't split
+    """
+    assert _to_argv("echo a | cat") is None
+    assert _to_argv("echo $HOME") is None
+    assert _to_argv("ls *.py") is None
+    assert _to_argv("FOO=bar env") is None
+    assert _to_argv("echo 'unbalanced") is None
+    assert _to_argv("exit 3") is None
+    assert _to_argv("") is None
+    assert _to_argv([]) is None
+
+
+def test_exec_cli_shell_fallback():
+    """
+    Test shell builtins and syntax errors are executed by the shell
+    """
+    assert exec_cli("exit 3", exit_code=3) == (True, "Good")
+    assert exec_cli("command -v ls", exit_code=0) == (True, "Good")
+    result, reason = exec_cli("echo 'unbalanced", exit_code=0)
+    assert not result and reason.startswith("Exit code is")
+
+
+def test_exec_cli_mixed_patterns():
+    """
+    Test a bytes pattern can be combined with a str pattern
+    """
+    result, reason = exec_cli("echo x", stdout_pattern=b"\xff", stderr_pattern="x")
+    assert not result and reason.startswith("STDOUT did not match")
+    assert exec_cli("echo x >&2", stdout_pattern=b"", stderr_pattern="x")[0]
+
+
+def test_exec_cli_patterns_per_stream():
+    """
+    Test bytes patterns are matched on raw output even when the other stream
+    has a str pattern
+    """
+    assert not exec_cli(r"printf '\376'", stdout_pattern=b"\xff", stderr_pattern="")[0]
+    assert exec_cli(r"printf '\376'", stdout_pattern=b"\xfe", stderr_pattern="")[0]
+
+
+def test_exec_cli_no_newline_translation():
+    """
+    Test str patterns see carriage returns as produced by the command
+    """
+    assert exec_cli(r"printf 'a\r\n'", stdout_pattern="a\r$")[0]
+    assert not exec_cli(r"printf 'OK\r\n'", stdout_pattern="OK$")[0]